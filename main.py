@@ -13,17 +13,17 @@ Note: This script is designed to run periodically to gather job data over time.
 """
 
 import os
+import io
+import gzip
 import logging
 import sys
 import re
+from functools import lru_cache
 from datetime import datetime, date
 
 import pandas as pd
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+import pyarrow as pa
+import pyarrow.parquet as pq
 from google.cloud import storage, bigquery
 from google.api_core.exceptions import NotFound, BadRequest
 from scraper_config import load_config
@@ -50,48 +50,94 @@ bucket_name = config['BUCKET_NAME']
 project_id = config['PROJECT_ID']
 dataset_id = config['DATASET_ID']
 
+IT_KEYWORDS = ['software', 'developer', 'engineer', 'data', 'analyst', 'network', 'security', 'system', 'admin', 'cloud']
+IT_SUPPORT_KEYWORDS = ['technology', r'help ?desk', 'service desk', 'desktop', 'deskside', r'tech(?:nical)? support',
+                       'user support', 'application support', 'comput']
+# keywords match at the start of a word so "systems", "administrator", "engineering" still count.
+# IT / I.T. / PC are case sensitive so the pronoun "it" doesn't match
+IT_KEYWORD_PATTERN = r'\b(?:IT|PC)\b|I\.T\.|(?i:\b(?:' + '|'.join(IT_KEYWORDS + IT_SUPPORT_KEYWORDS) + '))'
+
+# only alphanumeric tokens are kept from titles so a plain regex is enough
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
+
+# (?i) instead of re.IGNORECASE so the patterns work the same on every string dtype
+WORK_FORMAT_NAME_PATTERN = r'(?i)(Hybrid|Remote|In Person)'
+WORK_FORMAT_PATTERN = r'(?i)(?:Hybrid|Remote|In Person).*?in'
+
 def download_nltk_data():
-    """Download required NLTK data for text processing"""
-    nltk.download('punkt')
-    nltk.download('stopwords')
+    """Download required NLTK data for text processing if it isn't already installed"""
+    import nltk
+
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+
+@lru_cache(maxsize=None)
+def get_stop_words():
+    """Load the English stop words once, downloading the corpus on first use"""
+    from nltk.corpus import stopwords
+
+    download_nltk_data()
+    return frozenset(stopwords.words('english'))
+
+@lru_cache(maxsize=None)
+def get_storage_client():
+    """Create the GCS client once and reuse it for every upload"""
+    return storage.Client(project=project_id)
 
-def upload_to_gcs(df, bucket_name, blob_name):
+@lru_cache(maxsize=None)
+def get_bigquery_client():
+    """Create the BigQuery client once and reuse it for every load"""
+    return bigquery.Client(project=project_id)
+
+def upload_to_gcs(df, bucket_name, blob_name, fmt='parquet'):
     """
-    Upload DF to GCS
+    Stream DF to GCS as snappy-compressed Parquet or gzip-compressed CSV
     
     Args:
         df : The DF to upload
         bucket_name (str): The name of the GCS bucket
         blob_name (str): The name of the blob in GCS
+        fmt (str): 'parquet' or 'csv'
     """
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
+    bucket = get_storage_client().bucket(bucket_name)
     blob = bucket.blob(blob_name)
-    blob.upload_from_string(df.to_csv(index=False), 'text/csv')
+    blob.chunk_size = 8 * 1024 * 1024
+    if fmt == 'parquet':
+        blob.content_type = 'application/octet-stream'
+        # BigQuery takes column names from the parquet file, keep them in line with the table schema
+        table = pa.Table.from_pandas(df.rename(columns=lambda c: c.replace(' ', '_')), preserve_index=False)
+        with blob.open('wb', ignore_flush=True) as raw:
+            pq.write_table(table, raw, compression='snappy')
+    elif fmt == 'csv':
+        blob.content_type = 'text/csv'
+        blob.content_encoding = 'gzip'
+        with blob.open('wb', ignore_flush=True) as raw, gzip.GzipFile(fileobj=raw, mode='wb') as gz, \
+                io.TextIOWrapper(gz, encoding='utf-8', newline='') as text:
+            df.to_csv(text, index=False)
+    else:
+        raise ValueError(f"Unsupported upload format: {fmt}")
     logger.info(f"File uploaded to gs://{bucket_name}/{blob_name}")
 
-def split_work_format_and_location(location_string):
+def split_work_format_and_location(locations):
     """
-    Split the loc string into work type and location
+    Split the loc strings into work type and location using vectorized string ops
     
     Args:
-        location_string (str): The original loc string
+        locations (pd.Series): The original loc strings
     
     Returns:
-        tuple: (work_format, location)
+        pd.DataFrame: 'Work Format' and 'Processed Location' columns
     """
-    work_formats = ['Hybrid', 'Remote', 'In Person']
-    work_format = 'Unknown'
-    
-    for format in work_formats:
-        if format.lower() in location_string.lower():
-            work_format = format
-            location_string = re.sub(f'{format}.*?in', '', location_string, flags=re.IGNORECASE).strip()
-            break
-    
-    location = re.sub(r'\s+', ' ', location_string).strip()
+    work_format = locations.str.extract(WORK_FORMAT_NAME_PATTERN, expand=False).str.title().fillna('Unknown')
+    # arrow's regex engine only treats ascii as \s, indeed puts a non-breaking space before "(... area)"
+    location = (locations.str.replace(WORK_FORMAT_PATTERN, '', regex=True)
+                .str.replace('\xa0', ' ', regex=False)
+                .str.replace(r'\s+', ' ', regex=True)
+                .str.strip())
     
-    return work_format, location
+    return pd.concat([work_format, location], axis=1, keys=['Work Format', 'Processed Location'])
 
 def ensure_dataset_exists(client, dataset_id):
     """
@@ -101,7 +147,7 @@ def ensure_dataset_exists(client, dataset_id):
         client (bigquery.Client): BigQuery client
         dataset_id (str): The ID of the dataset to check or create
     """
-    dataset_ref = client.dataset(dataset_id)
+    dataset_ref = bigquery.DatasetReference(client.project, dataset_id)
     try:
         client.get_dataset(dataset_ref)
     except NotFound:
@@ -109,7 +155,7 @@ def ensure_dataset_exists(client, dataset_id):
         dataset = client.create_dataset(dataset)
         logger.info(f"Dataset {dataset_id} created.")
 
-def load_to_bigquery(bucket_name, blob_name, project_id, dataset_id, table_id):
+def load_to_bigquery(bucket_name, blob_name, project_id, dataset_id, table_id, fmt='parquet'):
     """
     Load data from GCS to BigQuery
     
@@ -119,29 +165,36 @@ def load_to_bigquery(bucket_name, blob_name, project_id, dataset_id, table_id):
         project_id (str): GC project ID
         dataset_id (str): BigQuery dataset ID
         table_id (str): BigQuery table ID
+        fmt (str): Format the blob was written in ('parquet' or 'csv')
     """
-    client = bigquery.Client()
+    client = get_bigquery_client()
     ensure_dataset_exists(client, dataset_id)
     
-    dataset_ref = client.dataset(dataset_id, project=project_id)
-    table_ref = dataset_ref.table(table_id)
+    table_ref = bigquery.DatasetReference(project_id, dataset_id).table(table_id)
     
-    job_config = bigquery.LoadJobConfig(
-        autodetect=False,
-        source_format=bigquery.SourceFormat.CSV,
-        schema=[
-            bigquery.SchemaField("Link", "STRING"),
-            bigquery.SchemaField("Job_Title", "STRING"),
-            bigquery.SchemaField("Company", "STRING"),
-            bigquery.SchemaField("Date_Posted", "STRING"),
-            bigquery.SchemaField("Location", "STRING"),
-            bigquery.SchemaField("Salary", "STRING"),
-            bigquery.SchemaField("Job_Type", "STRING"),
-            bigquery.SchemaField("Work_Format", "STRING"),
-            bigquery.SchemaField("Processed_Location", "STRING")
-        ],
-        write_disposition=bigquery.WriteDisposition.WRITE_APPEND
-    )
+    if fmt == 'parquet':
+        # parquet is self-describing so no schema is needed
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND
+        )
+    else:
+        job_config = bigquery.LoadJobConfig(
+            autodetect=False,
+            source_format=bigquery.SourceFormat.CSV,
+            schema=[
+                bigquery.SchemaField("Link", "STRING"),
+                bigquery.SchemaField("Job_Title", "STRING"),
+                bigquery.SchemaField("Company", "STRING"),
+                bigquery.SchemaField("Date_Posted", "STRING"),
+                bigquery.SchemaField("Location", "STRING"),
+                bigquery.SchemaField("Salary", "STRING"),
+                bigquery.SchemaField("Job_Type", "STRING"),
+                bigquery.SchemaField("Work_Format", "STRING"),
+                bigquery.SchemaField("Processed_Location", "STRING")
+            ],
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND
+        )
 
     uri = f"gs://{bucket_name}/{blob_name}"
     
@@ -160,47 +213,59 @@ def basic_data_analysis(df):
     Args:
         df (pd.DataFrame): DF to analyze
     """
+    company_counts = df['Company'].value_counts()
+    salary_mask = df['Salary'].ne('N/A')
+    salary_count = salary_mask.sum()
+
     logger.info("\nBasic Data Analysis:")
     logger.info(f"Total jobs scraped: {len(df)}")
-    logger.info(f"Unique companies: {df['Company'].nunique()}")
+    logger.info(f"Unique companies: {len(company_counts)}")
     logger.info(f"\nTop 5 companies by job postings:")
-    logger.info(df['Company'].value_counts().head())
+    logger.info(company_counts.head())
     logger.info(f"\nMost common jfob titles:")
     logger.info(df['Job Title'].value_counts().head())
     logger.info(f"\nLocation distribution :")
     logger.info(df['Location'].value_counts().head())
     logger.info(f"\nJob Type distribution:")
     logger.info(df['Job Type'].value_counts())
-    logger.info(f"\nSalary information available for {df['Salary'].ne('N/A').sum()} jobs")
-    if df['Salary'].ne('N/A').sum() > 0:
+    logger.info(f"\nSalary information available for {salary_count} jobs")
+    if salary_count > 0:
         logger.info(f"\nSample of salaries:")
-        logger.info(df[df['Salary'] != 'N/A']['Salary'].sample(min(5, df['Salary'].ne('N/A').sum())))
+        logger.info(df.loc[salary_mask, 'Salary'].sample(min(5, salary_count)))
 
-def identify_it_jobs(df):
+def identify_it_jobs(df, use_clustering=False):
     """
-    Identify all IT-related jobs using nlp 
+    Identify all IT-related jobs by matching keywords in the job title,
+    or optionally with the nlp clustering approach
     
     Args:
         df (pd.DataFrame): The DF containing job dat
+        use_clustering (bool): Use hashed title vectors + MiniBatchKMeans clusters instead of direct keyword matching
     
     Returns:
         pd.DataFrame: A DF containing only IT-related jobs
     """
     try:
-        stop_words = set(stopwords.words('english'))
+        if not use_clustering:
+            return df[df['Job Title'].str.contains(IT_KEYWORD_PATTERN, regex=True, na=False)]
+
+        # sklearn is slow to import and only needed here
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.cluster import MiniBatchKMeans
+
+        stop_words = get_stop_words()
         df['processed_title'] = df['Job Title'].apply(
-            lambda x: ' '.join([word.lower() for word in word_tokenize(x) 
-                                if word.isalnum() and word.lower() not in stop_words])
+            lambda x: ' '.join(word for word in _TOKEN_RE.findall(x.lower()) if word not in stop_words)
         )
 
-        vectorizer = TfidfVectorizer(max_features=1000)
-        tfidf_matrix = vectorizer.fit_transform(df['processed_title'])
+        # stateless single pass, no vocabulary to build
+        vectorizer = HashingVectorizer(n_features=1024, alternate_sign=False, norm='l2')
+        title_matrix = vectorizer.transform(df['processed_title'])
 
-        kmeans = KMeans(n_clusters=10, random_state=42)
-        df['cluster'] = kmeans.fit_predict(tfidf_matrix)
+        kmeans = MiniBatchKMeans(n_clusters=10, batch_size=1024, random_state=42)
+        df['cluster'] = kmeans.fit_predict(title_matrix)
 
-        it_keywords = ['software', 'developer', 'engineer', 'data', 'analyst', 'network', 'security', 'system', 'admin', 'cloud']
-        it_clusters = [i for i in range(10) if any(keyword in ' '.join(df[df['cluster'] == i]['processed_title']) for keyword in it_keywords)]
+        it_clusters = [i for i in range(10) if any(keyword in ' '.join(df[df['cluster'] == i]['processed_title']) for keyword in IT_KEYWORDS)]
 
         return df[df['cluster'].isin(it_clusters)]
     except Exception as e:
@@ -228,7 +293,11 @@ def main():
         else:
             logger.info(f"Found {total_jobs} jobs to scrape")
 
-        df = scrape_job_data(driver, country, total_jobs)
+        df = scrape_job_data(driver, country, total_jobs, full_url)
+        # overlapping result pages can list the same posting more than once. links differ per
+        # impression so dedupe on the job key, falling back to the link when there is none
+        job_keys = df['Job Key'].mask(df['Job Key'].eq('N/A'), df['Link'])
+        df = df[~job_keys.duplicated()].drop(columns='Job Key').reset_index(drop=True)
 
         if df.empty:
             logger.warning("No results found. Something went wrong D:")
@@ -237,7 +306,7 @@ def main():
             logger.info(f"Successfully scraped {len(df)} jobs")
             
             logger.info("Processing location data...")
-            df[['Work Format', 'Processed Location']] = df['Location'].apply(split_work_format_and_location).apply(pd.Series)
+            df[['Work Format', 'Processed Location']] = split_work_format_and_location(df['Location'])
             
             try:
                 df_it_jobs = identify_it_jobs(df)
@@ -247,7 +316,7 @@ def main():
                 logger.info("Proceeding with all scraped jobs")
                 df_it_jobs = df
 
-            blob_name = f'indeed_it_jobs_{target_date.strftime("%Y%m%d")}.csv'
+            blob_name = f'indeed_it_jobs_{target_date.strftime("%Y%m%d")}.parquet'
             upload_to_gcs(df_it_jobs, bucket_name, blob_name)
 
             table_id = 'indeed_it_jobs'
@@ -269,5 +338,4 @@ def main():
             driver.quit()
 
 if __name__ == "__main__":
-    download_nltk_data()
     main()
\ No newline at end of file
@@ -8,17 +8,22 @@ and scraping job details from search results
 """
 
 import logging
-import time
-from typing import Tuple, Optional
+import math
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Tuple, Optional
+from urllib.parse import parse_qs, urlparse
 
 import pandas as pd
-from bs4 import BeautifulSoup
+import requests
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium_stealth import stealth
 
@@ -26,6 +31,14 @@ from selenium_stealth import stealth
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+POOL_SIZE = 3  # Number of concurrent page fetches and maximum number of browsers, search driver included
+JOBS_PER_PAGE = 10  # Step of indeed's `start` query parameter between result pages
+# markers of the cloudflare challenge page indeed serves to suspected bots
+CHALLENGE_MARKERS = ('/cdn-cgi/challenge-platform/', '<title>Just a moment...</title>')
+# elements that only appear on a search result page, with or without listings
+RESULTS_PAGE_SELECTORS = ('.jobsearch-NoResult-messageHeader', 'nav[aria-label="pagination"]', '[data-testid^="pagination-page"]')
+JOB_COLUMNS = ['Link', 'Job Title', 'Company', 'Date Posted', 'Location', 'Salary', 'Job Type', 'Job Key']
+
 def configure_webdriver() -> webdriver.Chrome:
     """
     Configure and return a chrome driver with settings for stealth
@@ -38,6 +51,10 @@ def configure_webdriver() -> webdriver.Chrome:
     options.add_argument("start-maximized")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
+    # only the DOM is needed, skip images and don't wait for subresources
+    options.page_load_strategy = 'eager'
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
     driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
     stealth(driver,
             languages=["en-US", "en"],
@@ -85,7 +102,8 @@ def search_jobs(driver: webdriver.Chrome, country: str, job_position: str, job_l
 
     return full_url, total_jobs
 
-def scrape_job_data(driver: webdriver.Chrome, country: str, total_jobs: str) -> pd.DataFrame:
+def scrape_job_data(driver: webdriver.Chrome, country: str, total_jobs: str,
+                    search_url: Optional[str] = None, pool_size: int = POOL_SIZE) -> pd.DataFrame:
     """
     Scrape job data from Indeed search results
 
@@ -93,67 +111,304 @@ def scrape_job_data(driver: webdriver.Chrome, country: str, total_jobs: str) ->
         driver (webdriver.Chrome):chrome webdriver
         country (str): base url for indeed
         total_jobs (str): total number of jobs to scrape (or "Unknown")
+        search_url (Optional[str]): search url returned by search_jobs
+        pool_size (int): number of concurrent page fetches and maximum number of browsers
 
     Returns:
-        pd.DataFrame: DFe containing scraped job data
+        pd.DataFrame: DFe containing scraped job data (pyarrow backed string columns)
+    """
+    # from_records collects the generator into a list before building the frame
+    df = pd.DataFrame.from_records(iter_job_data(driver, country, total_jobs, search_url, pool_size), columns=JOB_COLUMNS)
+    # every column is a short string, arrow storage is far more compact than python str objects
+    return df.astype({column: 'string[pyarrow]' for column in JOB_COLUMNS})
+
+def iter_job_data(driver: webdriver.Chrome, country: str, total_jobs: str,
+                  search_url: Optional[str] = None, pool_size: int = POOL_SIZE) -> Iterator[dict]:
+    """
+    Yield job data from Indeed search results one posting at a time
+
+    When the search url and total number of jobs are known the result pages are
+    fetched and parsed by a pool of up to pool_size workers at once, otherwise
+    the pages are walked and parsed one by one with the next button
+
+    Args:
+        driver (webdriver.Chrome):chrome webdriver
+        country (str): base url for indeed
+        total_jobs (str): total number of jobs to scrape (or "Unknown")
+        search_url (Optional[str]): search url returned by search_jobs
+        pool_size (int): number of concurrent page fetches and maximum number of browsers
+
+    Yields:
+        dict: job data for a single posting
     """
-    df = pd.DataFrame(columns=['Link', 'Job Title', 'Company', 'Date Posted', 'Location', 'Salary', 'Job Type'])
-    job_count = 0
-    page = 0
-    max_retries = 3
     max_jobs = 15000  # Set a maximum number of jobs to scrape
 
+    if search_url and total_jobs != "Unknown" and pool_size > 1:
+        yield from iter_pages_in_parallel(driver, country, search_url, min(int(total_jobs), max_jobs), pool_size)
+        return
+
+    job_count = 0
+
     while True:
-        for retry in range(max_retries):
-            try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "job_seen_beacon"))
-                )
-                break
-            except TimeoutException:
-                if retry == max_retries - 1:
-                    logger.error("Failed to load job listings after multiple attempts")
-                    return df
-                logger.warning(f"Timeout on attempt {retry + 1}. Retrying...")
-                driver.refresh()
-
-        soup = BeautifulSoup(driver.page_source, 'lxml')
-        boxes = soup.find_all('div', class_='job_seen_beacon')
-
-        for box in boxes:
-            job_data = extract_job_data(box, country)
-            df = pd.concat([df, pd.DataFrame([job_data])], ignore_index=True)
+        if not wait_for_job_listings(driver):
+            logger.error("Failed to load job listings after multiple attempts")
+            return
+
+        for job_data in parse_job_listings(driver.page_source, country):
+            yield job_data
             job_count += 1
 
         logger.info(f"Scraped {job_count} jobs so far")
 
         if job_count >= max_jobs or (total_jobs != "Unknown" and job_count >= int(total_jobs)):
             logger.info("Reached the maximum number of jobs or the total number of jobs found")
-            break
+            return
 
         if not navigate_to_next_page(driver):
-            break
+            return
+
+def iter_pages_in_parallel(driver: webdriver.Chrome, country: str, search_url: str, num_jobs: int, pool_size: int) -> Iterator[dict]:
+    """
+    Scrape the result pages of a search with a pool of workers
+
+    The first page is read from the driver that ran the search, the following
+    pages are fetched in windows of pool_size pages on a thread pool. Workers
+    fetch pages over plain http with the browser's cookies and only borrow a
+    chrome driver when a request fails. Once indeed blocks a request all
+    workers switch to the browsers. The search driver is part of the browser
+    pool, so at most pool_size browsers run at once. Scraping stops at the
+    first page with no listings or no new postings
+
+    Args:
+        driver (webdriver.Chrome): driver that already has the first result page loaded
+        country (str): base url for indeed
+        search_url (str): search url returned by search_jobs
+        num_jobs (int): number of jobs to scrape
+        pool_size (int): number of concurrent page fetches and maximum number of browsers
+
+    Yields:
+        dict: job data for a single posting, in page order
+    """
+    num_pages = max(1, math.ceil(num_jobs / JOBS_PER_PAGE))
+
+    def posting_id(job_data: dict) -> str:
+        return job_data['Job Key'] if job_data['Job Key'] != 'N/A' else job_data['Link']
+
+    if not wait_for_job_listings(driver):
+        logger.error("Failed to load job listings after multiple attempts")
+        return
+    seen_ids = set()
+    for job_data in parse_job_listings(driver.page_source, country):
+        seen_ids.add(posting_id(job_data))
+        yield job_data
+    job_count = len(seen_ids)
+
+    # reuse the browser session for plain http requests, the browser pool is only a fallback
+    headers, cookies = get_session_state(driver)
+
+    local = threading.local()
+    http_blocked = threading.Event()
+    idle_drivers = queue.Queue()
+    idle_drivers.put(driver)
+    pool_drivers = []
+    lock = threading.Lock()
+
+    def acquire_driver() -> webdriver.Chrome:
+        with lock:
+            if idle_drivers.empty() and len(pool_drivers) < pool_size - 1:
+                # driver setup (and the chromedriver download) is not safe to run concurrently
+                page_driver = configure_webdriver()
+                pool_drivers.append(page_driver)
+                return page_driver
+        return idle_drivers.get()
+
+    def fetch_page(url: str) -> List[dict]:
+        if not http_blocked.is_set():
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = create_http_session(headers, cookies)
+                local.session = session
+            try:
+                response = session.get(url, timeout=20)
+                if is_blocked_response(response):
+                    # once indeed blocks the session every later request would be blocked too
+                    http_blocked.set()
+                    logger.warning(f"HTTP request for {url} was blocked (status {response.status_code}), using the browser from now on")
+                elif response.status_code == 200:
+                    page_records = parse_job_listings(response.text, country)
+                    # a results page without listings is the end of the results, the browser wouldn't find any either
+                    if page_records or is_results_page(response.text):
+                        return page_records
+                    logger.warning(f"HTTP request for {url} returned a page that is not a result page, using the browser")
+                else:
+                    logger.warning(f"HTTP request for {url} returned status {response.status_code}, using the browser")
+            except requests.RequestException as e:
+                logger.warning(f"HTTP request for {url} failed ({e}), using the browser")
+
+        page_driver = None
+        try:
+            page_driver = acquire_driver()
+            page_driver.get(url)
+            if not wait_for_job_listings(page_driver):
+                logger.error(f"Failed to load job listings for {url}")
+                return []
+            return parse_job_listings(page_driver.page_source, country)
+        except WebDriverException as e:
+            logger.error(f"Browser failed to load {url}: {e}")
+            return []
+        finally:
+            if page_driver is not None:
+                idle_drivers.put(page_driver)
+
+    executor = ThreadPoolExecutor(max_workers=pool_size)
+    try:
+        for window_start in range(1, num_pages, pool_size):
+            futures = [executor.submit(fetch_page, f'{search_url}&start={JOBS_PER_PAGE * page}')
+                       for page in range(window_start, min(window_start + pool_size, num_pages))]
+            for future in futures:
+                try:
+                    page_records = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to scrape result page: {e}")
+                    return
+                new_records = [job_data for job_data in page_records if posting_id(job_data) not in seen_ids]
+                if not new_records:
+                    logger.info("No new job listings, reached the end of the results")
+                    return
+                for job_data in new_records:
+                    seen_ids.add(posting_id(job_data))
+                    yield job_data
+                job_count += len(new_records)
+                logger.info(f"Scraped {job_count} jobs so far")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for page_driver in pool_drivers:
+            page_driver.quit()
+
+def get_session_state(driver: webdriver.Chrome) -> Tuple[dict, dict]:
+    """
+    Read the headers and cookies needed to continue the browser session over plain http
+
+    Args:
+        driver (webdriver.Chrome): driver that already loaded an indeed page
+
+    Returns:
+        Tuple[dict, dict]: request headers and cookies by name
+    """
+    user_agent = driver.execute_script("return navigator.userAgent").replace("HeadlessChrome", "Chrome")
+    headers = {
+        'User-Agent': user_agent,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Referer': driver.current_url,
+    }
+    cookies = {cookie['name']: cookie['value'] for cookie in driver.get_cookies()}
+    return headers, cookies
+
+def is_blocked_response(response: requests.Response) -> bool:
+    """
+    Check whether indeed refused an http request or answered with a bot challenge
+
+    Args:
+        response (requests.Response): response to check
+
+    Returns:
+        bool: True if the request was blocked, otherwise false
+    """
+    if response.status_code in (403, 429):
+        return True
+    return any(marker in response.text for marker in CHALLENGE_MARKERS)
+
+def is_results_page(page_source: str) -> bool:
+    """
+    Check whether a page is an indeed search result page rather than an interstitial
 
-    return df
+    Args:
+        page_source (str): html of the page
 
-def extract_job_data(box: BeautifulSoup, country: str) -> dict:
+    Returns:
+        bool: True if the page has a no-results message or pagination, otherwise false
+    """
+    tree = LexborHTMLParser(page_source)
+    return any(tree.css_first(selector) for selector in RESULTS_PAGE_SELECTORS)
+
+def create_http_session(headers: dict, cookies: dict) -> requests.Session:
+    """
+    Create a requests session carrying the browser's headers and cookies
+
+    Args:
+        headers (dict): request headers
+        cookies (dict): cookies by name
+
+    Returns:
+        requests.Session: configured session
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    session.cookies.update(cookies)
+    return session
+
+def wait_for_job_listings(driver: webdriver.Chrome, max_retries: int = 3) -> bool:
+    """
+    Wait for the job listings of the current page to load, refreshing on timeout
+
+    Args:
+        driver (webdriver.Chrome): configured chrome driver
+        max_retries (int): number of attempts before giving up
+
+    Returns:
+        bool: True if the job listings loaded, otherwise false
+    """
+    for retry in range(max_retries):
+        try:
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "job_seen_beacon"))
+            )
+            return True
+        except TimeoutException:
+            if retry == max_retries - 1:
+                return False
+            logger.warning(f"Timeout on attempt {retry + 1}. Retrying...")
+            driver.refresh()
+    return False
+
+def parse_job_listings(page_source: str, country: str) -> List[dict]:
+    """
+    Extract job data for every job posting box on a result page
+
+    Args:
+        page_source (str): html of the result page
+        country (str): base url for indeed
+
+    Returns:
+        List[dict]: job data for each posting on the page
+    """
+    tree = LexborHTMLParser(page_source)
+    return [extract_job_data(box, country) for box in tree.css('div.job_seen_beacon')]
+
+def extract_job_data(box: LexborNode, country: str) -> dict:
     """
     Extract job data from a single job posting box
 
     Args:
-        box (BeautifulSoup): BeautifulSoup obj representing a single job listing
+        box (LexborNode): selectolax lexbor node representing a single job listing
         country (str): base url for indeed
 
     Returns:
         dict: dictionary containing extracted job data
     """
-    link = country + box.find('a').get('href')
-    job_title = box.find('a', class_='jcs-JobTitle').text.strip() if box.find('a', class_='jcs-JobTitle') else 'N/A'
-    company = box.find('span', {'data-testid': 'company-name'}).text.strip() if box.find('span', {'data-testid': 'company-name'}) else 'N/A'
+    link = country + box.css_first('a').attributes.get('href')
+    title_element = box.css_first('a.jcs-JobTitle')
+    job_title = title_element.text().strip() if title_element else 'N/A'
+    company_element = box.css_first('span[data-testid="company-name"]')
+    company = company_element.text().strip() if company_element else 'N/A'
     date_posted = extract_date_posted(box)
-    location = box.find('div', {'data-testid': 'text-location'}).text.strip() if box.find('div', {'data-testid': 'text-location'}) else 'N/A'
-    salary = box.find('div', class_='metadata salary-snippet-container').text.strip() if box.find('div', class_='metadata salary-snippet-container') else 'N/A'
+    location_element = box.css_first('div[data-testid="text-location"]')
+    location = location_element.text().strip() if location_element else 'N/A'
+    salary_element = box.css_first('div.metadata.salary-snippet-container')
+    salary = salary_element.text().strip() if salary_element else 'N/A'
     job_type = extract_job_type(box)
+    job_key = extract_job_key(title_element, link)
 
     return {
         'Link': link,
@@ -162,42 +417,59 @@ def extract_job_data(box: BeautifulSoup, country: str) -> dict:
         'Date Posted': date_posted,
         'Location': location,
         'Salary': salary,
-        'Job Type': job_type
+        'Job Type': job_type,
+        'Job Key': job_key
     }
 
-def extract_date_posted(box: BeautifulSoup) -> str:
+def extract_job_key(title_element: Optional[LexborNode], link: str) -> str:
+    """
+    Extract indeed's job key, the stable id of a posting (links carry per-impression tokens)
+
+    Args:
+        title_element (Optional[LexborNode]): job title anchor of the posting
+        link (str): link to the posting
+
+    Returns:
+        str: job key or 'N/A' if not found
+    """
+    if title_element and title_element.attributes.get('data-jk'):
+        return title_element.attributes.get('data-jk')
+    return parse_qs(urlparse(link).query).get('jk', ['N/A'])[0]
+
+def extract_date_posted(box: LexborNode) -> str:
     """
     Extract the date posted from a job posting box
 
     Args:
-        box (BeautifulSoup): BeautifulSoup obj representing a single job listing
+        box (LexborNode): selectolax lexbor node representing a single job listing
 
     Returns:
         str: date posted or 'N/A' if not found
     """
-    date_elements = [
-        box.find('span', class_='date'),
-        box.find('span', {'data-testid': 'myJobsStateDate'}),
-        box.find('span', {'data-testid': 'job-age'})
+    date_selectors = [
+        'span.date',
+        'span[data-testid="myJobsStateDate"]',
+        'span[data-testid="job-age"]'
     ]
-    for date_element in date_elements:
+    for date_selector in date_selectors:
+        date_element = box.css_first(date_selector)
         if date_element:
-            return date_element.text.strip()
+            return date_element.text().strip()
     return 'N/A'
 
-def extract_job_type(box: BeautifulSoup) -> str:
+def extract_job_type(box: LexborNode) -> str:
     """
     Extract the job type from a job posting box
 
     Args:
-        box (BeautifulSoup): BeautifulSoup obj representing a single job listing
+        box (LexborNode): selectolax lexbor node representing a single job listing
 
     Returns:
         str: job type or 'Unknown' if not found
     """
-    job_type_element = box.find('div', class_='metadata')
+    job_type_element = box.css_first('div.metadata')
     if job_type_element:
-        job_type_text = job_type_element.text.strip().lower()
+        job_type_text = job_type_element.text().strip().lower()
         if 'full-time' in job_type_text:
             return 'Full-time'
         elif 'part-time' in job_type_text:
@@ -218,9 +490,16 @@ def navigate_to_next_page(driver: webdriver.Chrome) -> bool:
         next_button = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "a[data-testid='pagination-page-next']"))
         )
+        old_first_card = driver.find_element(By.CLASS_NAME, "job_seen_beacon")
         driver.execute_script("arguments[0].click();", next_button)
-        time.sleep(2)  # Add a small delay to allow the page to load
-        return True
     except (TimeoutException, NoSuchElementException):
         logger.info("No more pages to scrape")
-        return False
\ No newline at end of file
+        return False
+
+    # wait for the old listings to go away instead of sleeping a fixed amount, the caller
+    # waits (and retries) for the new listings with wait_for_job_listings
+    try:
+        WebDriverWait(driver, 10).until(EC.staleness_of(old_first_card))
+    except TimeoutException:
+        logger.warning("Timed out waiting for the next page to replace the current listings")
+    return True
\ No newline at end of file